@@ -2,4 +2,12 @@
 
 from setuptools import setup
 
-setup()
+try:
+    from Cython.Build import cythonize
+
+    # Optional accelerator modules; the package works without them
+    ext_modules = cythonize("src/tcanvas/*.pyx", language_level=3)
+except ImportError:
+    ext_modules = []
+
+setup(ext_modules=ext_modules)
@@ -0,0 +1,90 @@
+# cython: language_level=3
+"""Compiled helpers for rendering Texels.
+
+This is an optional accelerator module. If it has not been built,
+:mod:`tcanvas.tcanvas` falls back to the pure Python implementations.
+"""
+
+# String to default terminal colours, indexed by ord(character)
+cdef int CODES[128]
+cdef int _i
+for _i in range(128):
+    CODES[_i] = -1
+CODES[ord("k")] = 30
+CODES[ord("r")] = 31
+CODES[ord("g")] = 32
+CODES[ord("y")] = 33
+CODES[ord("b")] = 34
+CODES[ord("m")] = 35
+CODES[ord("c")] = 36
+CODES[ord("w")] = 37
+CODES[ord("0")] = 39  # Reset to default
+CODES[ord("K")] = 90
+CODES[ord("R")] = 91
+CODES[ord("G")] = 92
+CODES[ord("Y")] = 93
+CODES[ord("B")] = 94
+CODES[ord("M")] = 95
+CODES[ord("C")] = 96
+CODES[ord("W")] = 97
+
+
+cpdef str ansi_color_code(object color, bint bg=False):
+    """Return the ANSI colour code for the given colour."""
+
+    cdef int code = -1
+    cdef Py_UCS4 char
+
+    if isinstance(color, str) and len(<str>color) == 1:
+        char = (<str>color)[0]
+        if char < 128:
+            code = CODES[<int>char]
+        if code >= 0:
+            if bg:
+                code += 10
+            return "%d;" % code
+
+    # Other wise this probably a tuple of rgb values
+    if isinstance(color[0], float):
+        # Translate 0.0-1.0 floats to 0-255 ints
+        color = (
+            int(color[0] * 255),
+            int(color[1] * 255),
+            int(color[2] * 255),
+        )
+    if bg:
+        return "48;2;%d;%d;%d;" % color
+    else:
+        return "38;2;%d;%d;%d;" % color
+
+
+cpdef str render_style(tuple key):
+    """Return the ANSI sequence for a canonical tuple of Texel properties."""
+
+    cdef str character = key[0]
+    cdef str codes
+
+    codes = key[1]
+    codes += key[2]
+    if key[3]:
+        codes += "1;"
+    if key[4]:
+        codes += "2;"
+    if key[5]:
+        codes += "3;"
+    if key[6]:
+        codes += "4;"
+    if key[7]:
+        codes += "5;"
+    if key[8]:
+        codes += "7;"
+    if key[9]:
+        codes += "9;"
+    if key[10]:
+        codes += "53;"
+
+    if len(character) == 0:
+        character = " "
+
+    # Strip the last ";", print the character, then reset everything
+    return "\033[" + codes[:-1] + "m" + character + "\033[0m"
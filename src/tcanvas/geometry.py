@@ -1,31 +1,194 @@
+import numpy as np
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+
+def _bresenham(x0, y0, x1, y1):
+    """Yield the integer coordinates of a line as (x, y) pairs.
+
+    Classical Bresenham line algorithm; every texel is visited exactly
+    once and both endpoints are included.
+
+    """
+    dx = abs(x1 - x0)
+    dy = abs(y1 - y0)
+    sx = 1 if x0 < x1 else -1
+    sy = 1 if y0 < y1 else -1
+    err = dx - dy
+    while True:
+        yield x0, y0
+        if x0 == x1 and y0 == y1:
+            return
+        e2 = 2 * err
+        if e2 > -dy:
+            err -= dy
+            x0 += sx
+        if e2 < dx:
+            err += dx
+            y0 += sy
+
+
+if njit is not None:
+
+    @njit(cache=True)
+    def _raster_line(x0, y0, x1, y1):
+        """Rasterize a line into an (N, 2) array of integer coordinates.
+
+        Compiled Bresenham; see :func:`_bresenham`.
+
+        """
+        dx = abs(x1 - x0)
+        dy = abs(y1 - y0)
+        sx = 1 if x0 < x1 else -1
+        sy = 1 if y0 < y1 else -1
+        coords = np.empty((max(dx, dy) + 1, 2), dtype=np.int64)
+        err = dx - dy
+        i = 0
+        while True:
+            coords[i, 0] = x0
+            coords[i, 1] = y0
+            i += 1
+            if x0 == x1 and y0 == y1:
+                return coords
+            e2 = 2 * err
+            if e2 > -dy:
+                err -= dy
+                x0 += sx
+            if e2 < dx:
+                err += dx
+                y0 += sy
+
+    @njit(parallel=True, cache=True)
+    def _fill_polygon(
+        chars,
+        fg,
+        bg,
+        flags,
+        xs,
+        ys,
+        ymin,
+        ymax,
+        char_code,
+        fg_idx,
+        bg_idx,
+        set_mask,
+        clear_mask,
+    ):
+        """Rasterize a filled polygon into the canvas property arrays.
+
+        Compiled even-odd scanline fill. The rows are independent, so
+        they are processed in parallel. Negative codes and indices mean
+        "leave this property alone".
+
+        """
+        ncol = chars.shape[1]
+        n = xs.shape[0]
+        for row in prange(ymin, ymax + 1):
+            # Where do the polygon edges cross this row?
+            crossings = np.empty(n)
+            k = 0
+            x0 = xs[n - 1]
+            y0 = ys[n - 1]
+            for i in range(n):
+                x1 = xs[i]
+                y1 = ys[i]
+                # Half-open in y, so vertices are not counted twice
+                if y0 != y1 and min(y0, y1) <= row < max(y0, y1):
+                    crossings[k] = x0 + (row - y0) * (x1 - x0) / (y1 - y0)
+                    k += 1
+                x0 = x1
+                y0 = y1
+            crossings = np.sort(crossings[:k])
+            # Fill between pairs of crossings
+            for j in range(0, k - 1, 2):
+                a = int(np.rint(crossings[j]))
+                b = int(np.rint(crossings[j + 1]))
+                if a < 0:
+                    a = 0
+                if b > ncol - 1:
+                    b = ncol - 1
+                for col in range(a, b + 1):
+                    if char_code >= 0:
+                        chars[row, col] = np.uint32(char_code)
+                    if fg_idx >= 0:
+                        fg[row, col] = np.int16(fg_idx)
+                    if bg_idx >= 0:
+                        bg[row, col] = np.int16(bg_idx)
+                    flags[row, col] = np.uint16(
+                        (flags[row, col] | set_mask) & clear_mask
+                    )
+
+    # Compile the kernels once at import time
+    _raster_line(0, 0, 1, 1)
+    _fill_polygon(
+        np.zeros((1, 1), dtype=np.uint32),
+        np.zeros((1, 1), dtype=np.int16),
+        np.zeros((1, 1), dtype=np.int16),
+        np.zeros((1, 1), dtype=np.uint16),
+        np.zeros(3),
+        np.zeros(3),
+        0,
+        0,
+        -1,
+        -1,
+        -1,
+        0,
+        0xFFFF,
+    )
+
+else:
+    _raster_line = None
+    _fill_polygon = None
+
+
 class Geometry2D(object):
     """2D geometry methods."""
 
+    def line_raw(self, pos0, pos1, **kwargs):
+        """Draw a line between two positions in integer texel coordinates.
+
+        Skips the position transformation; use :meth:`line` for drawing
+        in transformed coordinates.
+
+        """
+
+        x0, y0 = pos0
+        x1, y1 = pos1
+        # Bresenham visits every texel exactly once
+        if _raster_line is not None:
+            coords = _raster_line(x0, y0, x1, y1).tolist()
+        else:
+            coords = _bresenham(x0, y0, x1, y1)
+        for pos in coords:
+            self.set(pos, None, **kwargs)
+
     def line(self, pos0, pos1, transformation=None, **kwargs):
         """Draw a line between the two positions."""
 
-        px0, py0 = pos0
-        px1, py1 = pos1
         x0, y0 = self.transform_position(pos0, transformation)
         x1, y1 = self.transform_position(pos1, transformation)
 
-        Dx = abs(x1 - x0)
-        Dy = abs(y1 - y0)
-        steps = max(Dx, Dy)
-
-        if steps == 0:
-            self.set(pos0, transformation, **kwargs)
+        if transformation is None:
+            self.line_raw((x0, y0), (x1, y1), **kwargs)
         else:
-            dpx = (px1 - px0) / steps
-            dpy = (py1 - py0) / steps
-            x = px0
-            y = py0
-            self.set((x, y), transformation, **kwargs)
+            # Named transformations can be arbitrary functions, so sample
+            # the line in source coordinates and transform every point
+            px0, py0 = pos0
+            px1, py1 = pos1
+            steps = max(abs(x1 - x0), abs(y1 - y0))
+
+            if steps == 0:
+                self.set(pos0, transformation, **kwargs)
+            else:
+                # Compute all intermediate positions in one go
+                xs = np.linspace(px0, px1, steps + 1)
+                ys = np.linspace(py0, py1, steps + 1)
 
-            for i in range(steps):
-                x += dpx
-                y += dpy
-                self.set((x, y), transformation, **kwargs)
+                for x, y in zip(xs.tolist(), ys.tolist()):
+                    self.set((x, y), transformation, **kwargs)
 
     def triangle(self, pos0, pos1, pos2, transformation=None, fill=True, **kwargs):
         """Draw a triangle."""
@@ -34,33 +197,91 @@ class Geometry2D(object):
         x1, y1 = self.transform_position(pos1, transformation=transformation)
         x2, y2 = self.transform_position(pos2, transformation=transformation)
 
-        self.line((x0, y0), (x1, y1), transformation=None, **kwargs)
-        self.line((x1, y1), (x2, y2), transformation=None, **kwargs)
-        self.line((x0, y0), (x2, y2), transformation=None, **kwargs)
+        self.line_raw((x0, y0), (x1, y1), **kwargs)
+        self.line_raw((x1, y1), (x2, y2), **kwargs)
+        self.line_raw((x0, y0), (x2, y2), **kwargs)
 
         if fill:
-            px0, py0 = pos0
-            px1, py1 = pos1
             Dx = abs(x1 - x0)
             Dy = abs(y1 - y0)
             steps = max(Dx, Dy)
 
             # First and last step were alreday drawn above
             if steps >= 2:
-                dpx = (px1 - px0) / steps
-                dpy = (py1 - py0) / steps
-                x = px0
-                y = py0
+                # The vertices are already transformed, so the fill lines
+                # can stay in texel coordinates
+                xs = np.linspace(x0, x1, steps + 1)[1:-1]
+                ys = np.linspace(y0, y1, steps + 1)[1:-1]
 
-                for i in range(steps - 1):
-                    x += dpx
-                    y += dpy
-                    self.line((x, y), pos2, transformation, **kwargs)
+                for x, y in zip(xs.tolist(), ys.tolist()):
+                    self.line_raw((int(round(x)), int(round(y))), (x2, y2), **kwargs)
 
     def polygon(self, vertices, transformation=None, fill=True, **kwargs):
         """Draw a polygon given by a list of vertices.
 
-        Filling only works with convex-ish polygons.
+        Filling uses an even-odd scanline algorithm and also works with
+        non-convex polygons.
+
+        """
+
+        points = [self.transform_position(pos, transformation) for pos in vertices]
+
+        if fill:
+            ncol, nrow = self.size
+            ymin = max(min(y for x, y in points), 0)
+            ymax = min(max(y for x, y in points), nrow - 1)
+            if _fill_polygon is not None:
+                # Rasterize the whole fill in the parallel kernel; the
+                # scanlines are independent of each other
+                char_code, fg_idx, bg_idx, set_mask, clear_mask = self._span_fill_args(
+                    kwargs
+                )
+                _fill_polygon(
+                    self._chars.view(np.uint32),
+                    self._fg,
+                    self._bg,
+                    self._flags,
+                    np.array([float(x) for x, y in points]),
+                    np.array([float(y) for x, y in points]),
+                    ymin,
+                    ymax,
+                    char_code,
+                    fg_idx,
+                    bg_idx,
+                    set_mask,
+                    clear_mask,
+                )
+            else:
+                self._fill_polygon_spans(points, ymin, ymax, **kwargs)
+
+        # Draw the outline
+        pos0 = points[-1]
+        for pos1 in points:
+            self.line(pos0, pos1, transformation=None, **kwargs)
+            pos0 = pos1
+
+    def _fill_polygon_spans(self, points, ymin, ymax, **kwargs):
+        """Fill a polygon with an even-odd scanline span per crossing pair."""
+
+        for row in range(ymin, ymax + 1):
+            # Where do the polygon edges cross this row?
+            crossings = []
+            x0, y0 = points[-1]
+            for x1, y1 in points:
+                # Half-open in y, so vertices are not counted twice
+                if y0 != y1 and min(y0, y1) <= row < max(y0, y1):
+                    crossings.append(x0 + (row - y0) * (x1 - x0) / (y1 - y0))
+                x0, y0 = x1, y1
+            crossings.sort()
+            # Fill between pairs of crossings
+            for xa, xb in zip(crossings[::2], crossings[1::2]):
+                self.set_span(row, int(round(xa)), int(round(xb)), **kwargs)
+
+    def polygon_slow(self, vertices, transformation=None, fill=True, **kwargs):
+        """Draw a polygon as a fan of triangles around the centroid.
+
+        Filling only works with convex-ish polygons and overdraws heavily;
+        prefer :meth:`polygon`.
 
         """
 
@@ -30,9 +30,149 @@ W      bright white
 
 """
 
+import functools
+import sys
+
+import numpy as np
+
 import click
 from .geometry import Geometry2D
 
+try:
+    # Optional compiled accelerator
+    from . import _render
+except ImportError:
+    _render = None
+
+
+# String to default terminal colours
+_COLOR_CODES = {
+    "k": 30,
+    "r": 31,
+    "g": 32,
+    "y": 33,
+    "b": 34,
+    "m": 35,
+    "c": 36,
+    "w": 37,
+    "0": 39,  # Reset to default
+    "K": 90,
+    "R": 91,
+    "G": 92,
+    "Y": 93,
+    "B": 94,
+    "M": 95,
+    "C": 96,
+    "W": 97,
+}
+# Pre-formatted ANSI fragments for foreground and background use
+_FG_CODES = {char: "%d;" % (code,) for char, code in _COLOR_CODES.items()}
+_BG_CODES = {char: "%d;" % (code + 10,) for char, code in _COLOR_CODES.items()}
+
+
+def _normalize_color(color):
+    """Return the colour in canonical form.
+
+    RGB tuples of floats are translated to tuples of 0-255 ints once, so
+    no arithmetic is left for the rendering path.
+
+    """
+    if isinstance(color, str):
+        return color
+    r, g, b = color
+    if isinstance(r, float):
+        # Translate 0.0-1.0 floats to 0-255 ints
+        return (int(r * 255), int(g * 255), int(b * 255))
+    return (r, g, b)
+
+
+# Texel effect flags as bits, with their ANSI codes in rendering order
+_FLAGS = (
+    ("bold", 1 << 0, "1;"),
+    ("faint", 1 << 1, "2;"),
+    ("italic", 1 << 2, "3;"),
+    ("underline", 1 << 3, "4;"),
+    ("blink", 1 << 4, "5;"),
+    ("inverse", 1 << 5, "7;"),
+    ("cross", 1 << 6, "9;"),
+    ("overline", 1 << 7, "53;"),
+)
+_FLAG_BITS = {name: bit for name, bit, _ in _FLAGS}
+
+
+@functools.lru_cache(maxsize=4096)
+def _style_prefix(fg_ansi, bg_ansi, flags):
+    """Return the ANSI sequence starting a run of the given style.
+
+    The sequence starts with a reset, since SGR attributes are additive
+    and the previous run's effects have to be cleared.
+
+    """
+    codes = "0;" + fg_ansi + bg_ansi
+    for _, bit, code in _FLAGS:
+        if flags & bit:
+            codes += code
+    # Remove last ";"
+    return "\033[" + codes[:-1] + "m"
+
+
+@functools.lru_cache(maxsize=4096)
+def _render_style(key):
+    """Return the ANSI sequence for a canonical tuple of Texel properties.
+
+    On a canvas full of identically styled texels the same tuple recurs
+    thousands of times per frame, so the cache turns most renders into a
+    single dict lookup.
+
+    """
+
+    if _render is not None:
+        return _render.render_style(key)
+
+    (
+        character,
+        fg_ansi,
+        bg_ansi,
+        bold,
+        faint,
+        italic,
+        underline,
+        blink,
+        inverse,
+        cross,
+        overline,
+    ) = key
+
+    ansi = "\033["
+    ansi += fg_ansi
+    ansi += bg_ansi
+    if bold:
+        ansi += "1;"
+    if faint:
+        ansi += "2;"
+    if italic:
+        ansi += "3;"
+    if underline:
+        ansi += "4;"
+    if blink:
+        ansi += "5;"
+    if inverse:
+        ansi += "7;"
+    if cross:
+        ansi += "9;"
+    if overline:
+        ansi += "53;"
+    ansi = ansi[:-1]  # Remove last ";"
+    ansi += "m"
+    if len(character) > 0:
+        ansi += character  # The actual character to print
+    else:
+        ansi += " "
+    # Finally reset everything
+    ansi += "\033[0m"
+
+    return ansi
+
 
 class Texel(object):
     """One character on the screen.
@@ -49,6 +189,22 @@ class Texel(object):
 
     """
 
+    __slots__ = (
+        "character",
+        "_fg_color",
+        "_fg_ansi",
+        "_bg_color",
+        "_bg_ansi",
+        "bold",
+        "faint",
+        "italic",
+        "underline",
+        "blink",
+        "inverse",
+        "cross",
+        "overline",
+    )
+
     def __init__(
         self,
         character="",
@@ -75,77 +231,71 @@ class Texel(object):
         self.cross = cross
         self.overline = overline
 
+    @property
+    def fg_color(self):
+        """The foreground colour."""
+        return self._fg_color
+
+    @fg_color.setter
+    def fg_color(self, color):
+        color = _normalize_color(color)
+        self._fg_color = color
+        # Cache the ANSI fragment, it rarely changes between renders
+        self._fg_ansi = self.ansi_color_code(color, bg=False)
+
+    @property
+    def bg_color(self):
+        """The background colour."""
+        return self._bg_color
+
+    @bg_color.setter
+    def bg_color(self, color):
+        color = _normalize_color(color)
+        self._bg_color = color
+        # Cache the ANSI fragment, it rarely changes between renders
+        self._bg_ansi = self.ansi_color_code(color, bg=True)
+
     @staticmethod
     def ansi_color_code(color, bg=False):
         """Return the ANSI colour code for the given colour."""
 
-        # String to default terminal colours
-        subs = {
-            "k": 30,
-            "r": 31,
-            "g": 32,
-            "y": 33,
-            "b": 34,
-            "m": 35,
-            "c": 36,
-            "w": 37,
-            "0": 39,  # Reset to default
-            "K": 90,
-            "R": 91,
-            "G": 92,
-            "Y": 93,
-            "B": 94,
-            "M": 95,
-            "C": 96,
-            "W": 97,
-        }
-        if color in subs:
-            if bg:
-                return "%d;" % (subs[color] + 10,)
-            else:
-                return "%d;" % (subs[color],)
+        if _render is not None:
+            return _render.ansi_color_code(color, bg)
+
+        code = _BG_CODES.get(color) if bg else _FG_CODES.get(color)
+        if code is not None:
+            return code
 
         # Other wise this probably a tuple of rgb values
-        if isinstance(color[0], float):
+        r, g, b = color
+        if isinstance(r, float):
             # Translate 0.0-1.0 floats to 0-255 ints
-            color = tuple(int(x * 255) for x in color)
+            r = int(r * 255)
+            g = int(g * 255)
+            b = int(b * 255)
         if bg:
-            return "48;2;%d;%d;%d;" % color
+            return "48;2;%d;%d;%d;" % (r, g, b)
         else:
-            return "38;2;%d;%d;%d;" % color
+            return "38;2;%d;%d;%d;" % (r, g, b)
 
     def render(self):
         """Return the ANSI sequence representing the Texel."""
 
-        ansi = "\033["
-        ansi += self.ansi_color_code(self.fg_color, bg=False)
-        ansi += self.ansi_color_code(self.bg_color, bg=True)
-        if self.bold:
-            ansi += "1;"
-        if self.faint:
-            ansi += "2;"
-        if self.italic:
-            ansi += "3;"
-        if self.underline:
-            ansi += "4;"
-        if self.blink:
-            ansi += "5;"
-        if self.inverse:
-            ansi += "7;"
-        if self.cross:
-            ansi += "9;"
-        if self.overline:
-            ansi += "53;"
-        ansi = ansi[:-1]  # Remove last ";"
-        ansi += "m"
-        if len(self.character) > 0:
-            ansi += self.character  # The actual character to print
-        else:
-            ansi += " "
-        # Finally reset everything
-        ansi += "\033[0m"
-
-        return ansi
+        return _render_style(
+            (
+                self.character,
+                self._fg_ansi,
+                self._bg_ansi,
+                self.bold,
+                self.faint,
+                self.italic,
+                self.underline,
+                self.blink,
+                self.inverse,
+                self.cross,
+                self.overline,
+            )
+        )
 
 
 class CanvasBase(object):
@@ -190,17 +340,123 @@ class CanvasBase(object):
             Initialise the Texels with these settings.
 
         """
-        self._buffer = []
         ncol, nrow = self.size
-        for row in range(nrow):
-            self._buffer.append([])
-            for column in range(ncol):
-                self._buffer[-1].append(Texel(**kwargs))
+        # Texel properties are stored as one array per property. Colours
+        # are stored as indices into a palette of colour values with
+        # pre-computed ANSI fragments, effects as a bit field.
+        self._color_indices = {}
+        self._colors = []
+        self._fg_codes = []
+        self._bg_codes = []
+        default = self._color_index("0")
+        try:
+            # Reuse the buffers with bulk fills instead of reallocating
+            self._chars[:] = ""
+            self._fg[:] = default
+            self._bg[:] = default
+            self._flags[:] = 0
+        except AttributeError:
+            self._chars = np.full((nrow, ncol), "", dtype="U1")
+            self._fg = np.full((nrow, ncol), default, dtype=np.int16)
+            self._bg = np.full((nrow, ncol), default, dtype=np.int16)
+            self._flags = np.zeros((nrow, ncol), dtype=np.uint16)
+        if kwargs:
+            self._set_texels(slice(None), slice(None), kwargs)
+
+    def _color_index(self, color):
+        """Return the palette index of the given colour, adding it if new."""
+        color = _normalize_color(color)
+        try:
+            return self._color_indices[color]
+        except KeyError:
+            index = len(self._colors)
+            self._color_indices[color] = index
+            self._colors.append(color)
+            self._fg_codes.append(Texel.ansi_color_code(color, bg=False))
+            self._bg_codes.append(Texel.ansi_color_code(color, bg=True))
+            return index
+
+    def _set_texels(self, row, col, kwargs):
+        """Write texel properties at the given array index or slice."""
+        for attr, val in kwargs.items():
+            if attr == "character":
+                self._chars[row, col] = val
+            elif attr == "fg_color":
+                self._fg[row, col] = self._color_index(val)
+            elif attr == "bg_color":
+                self._bg[row, col] = self._color_index(val)
+            else:
+                try:
+                    bit = _FLAG_BITS[attr]
+                except KeyError:
+                    raise AttributeError("Unknown texel property: %s" % (attr,))
+                if val:
+                    self._flags[row, col] |= np.uint16(bit)
+                else:
+                    self._flags[row, col] &= ~np.uint16(bit)
+
+    def _span_fill_args(self, kwargs):
+        """Translate texel properties to compiled fill kernel arguments.
+
+        Returns
+        -------
+
+        char_code, fg_idx, bg_idx, set_mask, clear_mask : int
+            Negative codes and indices mean "leave this property alone".
+
+        """
+        char_code = -1
+        fg_idx = -1
+        bg_idx = -1
+        set_mask = 0
+        clear_mask = 0xFFFF
+        for attr, val in kwargs.items():
+            if attr == "character":
+                # Like U1 array assignment: truncate to the first character
+                char_code = ord(val[0]) if len(val) > 0 else 0
+            elif attr == "fg_color":
+                fg_idx = self._color_index(val)
+            elif attr == "bg_color":
+                bg_idx = self._color_index(val)
+            else:
+                try:
+                    bit = _FLAG_BITS[attr]
+                except KeyError:
+                    raise AttributeError("Unknown texel property: %s" % (attr,))
+                if val:
+                    set_mask |= bit
+                else:
+                    clear_mask &= ~bit & 0xFFFF
+        return char_code, fg_idx, bg_idx, set_mask, clear_mask
 
     @property
     def buffer(self):
-        """Return the buffer of the canvas."""
-        return self._buffer
+        """Return the contents of the canvas as a nested list of Texels.
+
+        The Texels are built on demand from the internal buffers.
+        Modifying them does not modify the canvas.
+
+        """
+        buffer = []
+        for chars, fgs, bgs, flags in zip(
+            self._chars.tolist(),
+            self._fg.tolist(),
+            self._bg.tolist(),
+            self._flags.tolist(),
+        ):
+            line = []
+            for char, fg, bg, flag in zip(chars, fgs, bgs, flags):
+                effects = {name: bool(flag & bit) for name, bit in _FLAG_BITS.items()}
+                line.append(
+                    Texel(
+                        character=char,
+                        fg_color=self._colors[fg],
+                        bg_color=self._colors[bg],
+                        **effects
+                    )
+                )
+            buffer.append(line)
+        return buffer
 
     @property
     def transformations(self):
@@ -221,20 +477,39 @@ class CanvasBase(object):
         # x = columns from the left
         # y = rows from the top
         if transformation is None:
-            return tuple(int(round(x)) for x in pos)
+            return int(round(pos[0])), int(round(pos[1]))
 
         # Look up transformation
         return self._transformations[transformation](pos)
 
+    def _render_row(self, row):
+        """Render one row of the canvas as a string.
+
+        Adjacent texels with identical style share a single ANSI prefix.
+
+        """
+        fg_codes = self._fg_codes
+        bg_codes = self._bg_codes
+        parts = []
+        last_style = None
+        for char, fg, bg, flags in zip(
+            self._chars[row].tolist(),
+            self._fg[row].tolist(),
+            self._bg[row].tolist(),
+            self._flags[row].tolist(),
+        ):
+            style = (fg, bg, flags)
+            if style != last_style:
+                parts.append(_style_prefix(fg_codes[fg], bg_codes[bg], flags))
+                last_style = style
+            parts.append(char or " ")
+        # Finally reset everything
+        parts.append("\033[0m")
+        return "".join(parts)
+
     def render(self):
         """Render the canvas as a string."""
-        string = ""
-        for line in self.buffer:
-            for texel in line:
-                string += texel.render()
-            string += "\n"
-        # Remove last newline
-        return string[:-1]
+        return "\n".join(self._render_row(row) for row in range(self._rows))
 
     def show(self):
         """Print the canvas to the screen.
@@ -245,6 +520,18 @@ class CanvasBase(object):
 
         click.echo(self.render())
 
+    def show_fast(self):
+        """Print the canvas directly to stdout as bytes.
+
+        Bypasses click's stream handling, which saves some overhead per
+        frame in animation loops. Like :meth:`show`, this does not print
+        a final newline.
+
+        """
+
+        sys.stdout.buffer.write(self.render().encode("utf-8"))
+        sys.stdout.buffer.flush()
+
     def set(self, pos, transformation=None, **kwargs):
         """Set texel properties at the given position.
 
@@ -261,11 +548,40 @@ class CanvasBase(object):
 
         """
 
-        col, row = self.transform_position(pos, transformation)
-        ncol, nrow = self.size
-        if 0 <= col < ncol and 0 <= row < nrow:
-            for attr, val in kwargs.items():
-                setattr(self._buffer[row][col], attr, val)
+        # Inline the default transformation, set() runs once per pixel
+        if transformation is None:
+            col = int(round(pos[0]))
+            row = int(round(pos[1]))
+        else:
+            col, row = self._transformations[transformation](pos)
+        if 0 <= col < self._columns and 0 <= row < self._rows:
+            self._set_texels(row, col, kwargs)
+
+    def set_span(self, row, col0, col1, **kwargs):
+        """Set texel properties for a horizontal run of texels.
+
+        The run covers the columns `col0` to `col1` inclusive, clipped to
+        the canvas. All texels in the run are written in one array
+        operation.
+
+        Parameters
+        ----------
+
+        row, col0, col1 : int
+            The texel row and the first and last column of the run
+        **kwargs : optional
+            The properties of the Texels to be set
+
+        """
+
+        if not 0 <= row < self._rows:
+            return
+        if col0 > col1:
+            col0, col1 = col1, col0
+        col0 = max(col0, 0)
+        col1 = min(col1, self._columns - 1)
+        if col0 <= col1:
+            self._set_texels(row, slice(col0, col1 + 1), kwargs)
 
     def text(self, pos, text, transformation=None, **kwargs):
         """Write some text at the specified position."""
@@ -37,14 +37,30 @@ def test_tcanvas():
     c.polygon([(10, 5), (18, 6), (19, 8), (18, 9), (12, 6)], bg_color="y", fg_color="k")
     c.polygon([(10, 5), (18, 6), (19, 8), (18, 9), (12, 6)], character="p", fill=False)
     c.rectangle((17, 3), (19, 5), character="r")
+    c.set_span(9, 2, 6, character="s", fg_color="G")
     c.show()
 
 
+def test_concave_polygon():
+    c = TCanvas(columns=21, rows=8, bg_color="K")
+    # The scanline fill handles non-convex polygons; the notch between
+    # the wings must stay empty
+    c.polygon([(2, 7), (10, 1), (18, 7), (10, 4)], bg_color="m", fg_color="w")
+    buffer = c.buffer
+    assert buffer[6][10].bg_color == "K"
+    assert buffer[6][4].bg_color == "m"
+    # The old triangle-fan fill is still available
+    c.polygon_slow([(14, 1), (19, 1), (19, 3)], bg_color="b")
+    c.show_fast()
+    echo("")
+
+
 def main():
     """Run some tests."""
 
     test_texel()
     test_tcanvas()
+    test_concave_polygon()
 
 
 if __name__ == "__main__":